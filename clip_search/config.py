@@ -1,6 +1,7 @@
 # In clip_search/config.py
 
 import os
+import types
 
 # --- General Application Settings ---
 APP_NAME = "CLIP Image Search"
@@ -8,20 +9,65 @@ APP_VERSION = "1.1.0"
 
 # --- Image Processing Settings ---
 IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+IMAGE_EXTENSIONS_SET = frozenset(IMAGE_EXTENSIONS) # For O(1) lookups while scanning folders
+IMAGE_DIALOG_FILTER = "Images (" + " ".join("*" + ext for ext in IMAGE_EXTENSIONS) + ")"
+# JPEGs are decoded at a reduced scale (by libjpeg, during the IDCT) as long as both sides stay at
+# least this large, so huge photos aren't fully decoded only to be shrunk to the model's input size.
+# Decoding is faster still with Pillow-SIMD: pip uninstall pillow && pip install pillow-simd
+JPEG_DRAFT_SIZE = 512
+# On CUDA, decode JPEGs on the GPU with nvJPEG instead of in the indexing workers. Files it can't
+# handle fall back to the CPU. GPU_JPEG_DECODE_CHUNK full resolution images are decoded at a time.
+GPU_JPEG_DECODE = True
+GPU_JPEG_DECODE_CHUNK = 8
+# Number of threads listing folders in parallel while looking for images. Helps most on network drives.
+SCAN_THREADS = 16
 # Batch size for encoding images. Lower this if you run out of VRAM/RAM during indexing.
 BATCH_SIZE = 64
+# Number of worker processes that decode and preprocess images while the model encodes. 0 disables them.
+INDEXING_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+# Compile the model's encoders with torch.compile on CUDA. Loading takes longer, encoding is faster.
+COMPILE_MODEL = True
+# Number of recent text queries whose encoded features are kept, so repeated searches skip the text encoder.
+TEXT_CACHE_SIZE = 128
+# Text queries whose features have at least this cosine similarity to a recent query reuse its results
+# instead of scoring the whole index again. Set above 1.0 to disable.
+SEMANTIC_CACHE_THRESHOLD = 0.98
+# Number of recent text queries whose results are kept for the semantic cache.
+SEMANTIC_CACHE_SIZE = 64
 
 # --- Caching Settings ---
 # A hidden subdirectory inside the image folder to store cache files.
 CACHE_DIR_NAME = ".clip_search_cache"
-# The cache filename will be generated based on the model, e.g., "cache_ViT-B-32_laion2b_s34b_b79k.pkl"
+# The cache filename will be generated based on the model, e.g., "cache_ViT_B_32_laion2b_s34b_b79k.safetensors".
+# The indexed file list is kept next to it in "cache_....safetensors.json".
+# An unfinished indexing run leaves checkpoint files next to it ("cache_....safetensors.part0", ".part1", ...).
+# While indexing, newly encoded features are saved every this many batches, so a cancelled or
+# interrupted run picks up where it stopped instead of starting over.
+CACHE_CHECKPOINT_BATCHES = 50
+# Pre-scaled result thumbnails are stored in this subdirectory of the cache directory.
+THUMBNAIL_CACHE_DIR_NAME = "thumbs"
+# Maximum number of cached thumbnails per image folder. The least recently used ones are deleted first.
+THUMBNAIL_CACHE_MAX_ENTRIES = 5000
+# The cache is checked against that limit after every this many newly written thumbnails.
+THUMBNAIL_CACHE_TRIM_INTERVAL = 200
+
+# --- Search Index Settings ---
+# Libraries with at least this many images are searched through an approximate FAISS IVF-PQ index
+# instead of scoring every image. Requires the optional 'faiss-cpu' (or 'faiss-gpu') package.
+ANN_INDEX_MIN_IMAGES = 10000
+# Number of index clusters scanned per query. Higher is more accurate but slower.
+ANN_INDEX_NPROBE = 16
+# Number of product-quantization sub-vectors per feature; must divide the model's feature size.
+ANN_INDEX_PQ_SUBVECTORS = 32
+# The index returns this many times more candidates than requested; they are then ranked exactly.
+ANN_RERANK_FACTOR = 4
 
 # --- Model Configuration ---
 # This dictionary defines the models available in the UI.
 # 'model_name' & 'pretrained': Required by the open_clip library.
 # 'notes': A user-friendly description to guide the user.
 
-AVAILABLE_MODELS = {
+_MODELS = {
     # User-facing Name: {model_details}
     "Fast (ViT-B/32)": {
         "model_name": "ViT-B-32",
@@ -40,6 +86,9 @@ AVAILABLE_MODELS = {
     }
 }
 
+# Read-only views, so the configuration can be shared (e.g. across threads) without being copied
+AVAILABLE_MODELS = types.MappingProxyType({key: types.MappingProxyType(info) for key, info in _MODELS.items()})
+
 # Set the default model to be used when the application starts
 DEFAULT_MODEL_KEY = "Fast (ViT-B/32)"
 
@@ -48,4 +97,5 @@ THUMBNAIL_SIZE = 150              # Size of the result thumbnails in pixels (wid
 WINDOW_SIZE = (1200, 800)         # Default window size (width, height)
 DEFAULT_TOP_K = 24                # Default number of search results to show
 MAX_TOP_K = 200                   # Maximum number of results the user can request
+RESULTS_ICON_CACHE_SIZE = 256     # Decoded result thumbnails kept in memory (keep >= MAX_TOP_K)
 RESULTS_GRID_SPACING = 10         # Space between thumbnails in the results grid
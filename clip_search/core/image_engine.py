@@ -1,8 +1,10 @@
 import os
+import math
+import json
 import hashlib
-import pickle
-import torch
-import open_clip
+import collections
+import concurrent.futures
+import inspect
 from PIL import Image
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot # <-- Import pyqtSlot
 
@@ -20,9 +22,125 @@ if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
 # Disable PIL's image size limit to handle large images
 Image.MAX_IMAGE_PIXELS = None
 
+# torch and open_clip take seconds to import. They are loaded on first use by _ensure_backend(),
+# which runs on the worker thread, so the window can appear before they are ready.
+# faiss is optional; without it every search scores the full index exactly.
+torch = None
+torchvision = None
+open_clip = None
+safetensors_torch = None
+faiss = None
+
+def _ensure_backend():
+    """Imports torch, open_clip, safetensors and (if installed) faiss into this module's namespace if not done yet."""
+    global torch, torchvision, open_clip, safetensors_torch, faiss
+    if torch is None:
+        import open_clip as _open_clip
+        import torchvision as _torchvision # Installed with open_clip
+        import safetensors.torch as _safetensors_torch
+        try:
+            import faiss as _faiss
+            _faiss.omp_set_num_threads(os.cpu_count() or 1)
+        except ImportError:
+            _faiss = None
+        import torch as _torch
+        open_clip = _open_clip
+        torchvision = _torchvision
+        safetensors_torch = _safetensors_torch
+        faiss = _faiss
+        torch = _torch
+
 def is_image_file(filename):
     """A helper function to check for valid image extensions."""
-    return filename.lower().endswith(config.IMAGE_EXTENSIONS)
+    return os.path.splitext(filename)[1].lower() in config.IMAGE_EXTENSIONS_SET
+
+def _scan_single_directory(directory):
+    """
+    Lists one directory for ImageEngine._scan_directory.
+    Returns (subdirectories to scan, [(path, size, mtime_ns)] of the images in it).
+    """
+    subdirectories, images = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # A single unreadable entry (e.g. a dangling symlink, or a file deleted
+                # while scanning) is skipped without losing the rest of the directory
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink() and entry.name != config.CACHE_DIR_NAME:
+                            subdirectories.append(entry.path)
+                    elif is_image_file(entry.name) and entry.is_file():
+                        stat = entry.stat()
+                        images.append((os.path.normpath(entry.path), stat.st_size, stat.st_mtime_ns))
+                except OSError as e:
+                    print(f"Could not read '{entry.path}': {e}")
+    except OSError as e:
+        print(f"Could not scan directory '{directory}': {e}")
+    return subdirectories, images
+
+def _scatter_features(features, filled, positions, paths, rows):
+    """
+    Copies the (n, D) feature rows of 'paths' to their positions in 'features' and marks them in
+    'filled'. Allocates the (len(positions), D) FP16 tensor first if 'features' is None. Returns it.
+    """
+    if features is None:
+        features = torch.empty((len(positions), rows.shape[1]), dtype=torch.float16)
+    index = torch.tensor([positions[path] for path in paths], dtype=torch.long)
+    features[index] = rows.to(torch.float16)
+    filled[index] = True
+    return features
+
+_JPEG_EXTENSIONS = frozenset(('.jpg', '.jpeg'))
+
+def _preprocess_image(path, preprocess):
+    """Opens and preprocesses an image on the CPU. Returns None if it can't be read."""
+    try:
+        image = Image.open(path)
+        image.draft("RGB", (config.JPEG_DRAFT_SIZE, config.JPEG_DRAFT_SIZE)) # No-op for other formats
+        return preprocess(image.convert("RGB"))
+    except Exception as e:
+        print(f"Warning: Skipping corrupted image '{path}': {e}")
+        return None
+
+class _ImageDataset:
+    """
+    A map-style dataset that opens and preprocesses images for a torch DataLoader.
+    It lives at module level so it can be pickled into spawned worker processes.
+    With raw_jpeg, JPEG files are only read, and are decoded on the GPU by the engine.
+    """
+
+    def __init__(self, paths, preprocess, raw_jpeg=False):
+        self.paths = paths
+        self.preprocess = preprocess
+        self.raw_jpeg = raw_jpeg
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        path = self.paths[index]
+        if self.raw_jpeg and os.path.splitext(path)[1].lower() in _JPEG_EXTENSIONS:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if data:
+                    return path, data
+            except OSError:
+                pass # Reported by the regular path below
+        return path, _preprocess_image(path, self.preprocess)
+
+def _collate_images(samples):
+    """
+    Stacks the readable images of a batch. Returns (paths, tensor or None, jpeg_paths, jpeg_data),
+    where jpeg_data holds the raw bytes of the JPEG files left to the GPU, as uint8 tensors.
+    """
+    # Also runs in spawned worker processes, which only need torch itself, not the whole backend
+    import torch
+    images = [(path, image) for path, image in samples if isinstance(image, torch.Tensor)]
+    jpegs = [(path, data) for path, data in samples if isinstance(data, bytes)]
+    batch = torch.stack([image for _, image in images]) if images else None
+    jpeg_data = [torch.frombuffer(bytearray(data), dtype=torch.uint8) for _, data in jpegs]
+    return [path for path, _ in images], batch, [path for path, _ in jpegs], jpeg_data
 
 class ImageEngine(QObject):
     """
@@ -32,18 +150,28 @@ class ImageEngine(QObject):
     progress = pyqtSignal(int, int, str)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    search_results_ready = pyqtSignal(list)
 
     def __init__(self):
         super().__init__()
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = None # Decided once torch is imported, in load_model
         self.model = None
         self.preprocess = None
+        self._gpu_preprocess = None # (resize, interpolation, crop, mean, std) for nvJPEG decoding, see load_model
         self.model_key = None
         self._is_indexing = False
 
         self.image_paths = []
+        self._path_to_idx = {} # Path -> row in image_features
         self.image_features = None
+        self._ann_index = None # Approximate nearest-neighbour index for large libraries, see _build_ann_index
         self.current_directory = None
+        # Recently used text queries -> normalized text features, in least-recently-used order
+        self._text_cache = collections.OrderedDict()
+        # Semantic result cache: text features of recent queries (K, D) and their (top_k, results)
+        self._semantic_keys = None
+        self._semantic_values = []
+        self._directory_hash = None # Hash of the currently indexed directory, guards persisted results
 
     @pyqtSlot() # <-- ADDED: Mark as a slot with no arguments
     def stop_indexing(self):
@@ -59,7 +187,11 @@ class ImageEngine(QObject):
 
         try:
             self.progress.emit(0, 100, f"Loading model: {model_key}...")
+            _ensure_backend()
+            if self.device is None:
+                self.device = "cuda" if torch.cuda.is_available() else "cpu"
             model_info = config.AVAILABLE_MODELS[model_key]
+            self.save_query_cache() # Persist the outgoing model's query caches before they are dropped
             
             self.model, _, self.preprocess = open_clip.create_model_and_transforms(
                 model_name=model_info['model_name'],
@@ -67,12 +199,54 @@ class ImageEngine(QObject):
                 device=self.device
             )
             self.model.eval()
+            self._gpu_preprocess = self._get_gpu_preprocess()
+            if self.device == "cuda":
+                # Lets convolutions (e.g. the patch embedding) use Tensor Core friendly NHWC kernels
+                self.model.to(memory_format=torch.channels_last)
+                if config.COMPILE_MODEL:
+                    self._compile_model(model_key)
             self.model_key = model_key
+            # Cached text features belong to the previous model's embedding space; re-encode the
+            # recent queries for the new model in one batch so they stay instant
+            recent_queries = list(self._text_cache)
+            self._text_cache.clear()
+            if recent_queries:
+                with torch.inference_mode():
+                    self._encode_texts(recent_queries)
+            self._clear_semantic_cache()
+            self._directory_hash = None # The index has to be rebuilt for the new model
+            self._ann_index = None
             self.finished.emit("Model loaded successfully.")
             print(f"Model '{model_key}' loaded on {self.device}.")
         except Exception as e:
             self.error.emit(f"Failed to load model '{model_key}'.\nError: {e}")
 
+    def _compile_model(self, model_key):
+        """
+        Compiles the image and text encoders with torch.compile and runs each once, so the
+        compilation happens while loading rather than on the first search. Falls back to eager
+        mode when compilation isn't supported in this environment (e.g. Triton is missing).
+        """
+        eager_encode_image, eager_encode_text = self.model.encode_image, self.model.encode_text
+        try:
+            self.progress.emit(0, 100, f"Optimizing model: {model_key}...")
+            # dynamic=True avoids recompiling for the smaller last batch or a different query length
+            self.model.encode_image = torch.compile(eager_encode_image, dynamic=True)
+            self.model.encode_text = torch.compile(eager_encode_text, dynamic=True)
+            # Compiled code is specialized on the autocast state and on batches of one, so warm up
+            # each encoder the way it is called later: images under autocast (_encode_images),
+            # text without it (_encode_texts), both with one and with several inputs.
+            with torch.inference_mode():
+                dummy_batch = self.preprocess(Image.new("RGB", (256, 256))).unsqueeze(0).to(self.device)
+                with torch.autocast(device_type="cuda", dtype=torch.float16):
+                    for batch in (dummy_batch, torch.cat([dummy_batch, dummy_batch])):
+                        self.model.encode_image(batch.contiguous(memory_format=torch.channels_last))
+                for prompts in (["a photo"], ["a photo", "a picture"]):
+                    self.model.encode_text(open_clip.tokenize(prompts).to(self.device))
+        except Exception as e:
+            print(f"Could not compile model, using eager mode: {e}")
+            self.model.encode_image, self.model.encode_text = eager_encode_image, eager_encode_text
+
     def _get_cache_path(self, image_folder):
         """Generates a unique cache file path based on folder and model."""
         if not self.model_key:
@@ -81,25 +255,196 @@ class ImageEngine(QObject):
         model_filename = f"{model_info['model_name']}_{model_info['pretrained']}"
         sanitized_filename = model_filename.replace('/', '_').replace('-', '_')
         cache_dir = os.path.join(image_folder, config.CACHE_DIR_NAME)
-        return os.path.join(cache_dir, f"cache_{sanitized_filename}.pkl")
+        return os.path.join(cache_dir, f"cache_{sanitized_filename}.safetensors")
+
+    def _get_query_cache_path(self, image_folder):
+        """Returns the file that persists the text query caches for a folder and the current model."""
+        cache_path = self._get_cache_path(image_folder)
+        if cache_path is None:
+            return None
+        cache_dir, cache_filename = os.path.split(cache_path)
+        return os.path.join(cache_dir, f"q{cache_filename}")
+
+    def _read_feature_cache(self, cache_path):
+        """
+        Returns (directory_hash, paths, stamps, features, serialized_ann_index) from a feature cache
+        or checkpoint file, or None if there is none. 'features' is a single (N, D) FP16 tensor whose
+        rows match 'paths', and 'stamps' holds the (size, mtime_ns) of each file when it was encoded.
+        """
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with safetensors_torch.safe_open(cache_path, framework="pt") as f:
+                metadata = f.metadata() or {}
+                features = f.get_tensor('features')
+                ann_index = f.get_tensor('ann_index').numpy() if 'ann_index' in f.keys() else None
+            with open(f"{cache_path}.json", 'rb') as f:
+                listing = f.read()
+            # The two files are replaced one after the other, so make sure they belong together
+            if hashlib.blake2b(listing, digest_size=16).hexdigest() != metadata.get('listing_digest'):
+                print(f"Cache file '{cache_path}' doesn't match its file list, ignoring it.")
+                return None
+            listing = json.loads(listing)
+            stamps = [tuple(stamp) for stamp in listing['stamps']]
+            return metadata.get('directory_hash'), listing['paths'], stamps, features, ann_index
+        except Exception as e:
+            print(f"Could not read cache file '{cache_path}': {e}")
+            return None
+
+    def _write_feature_file(self, path, tensors, paths, stamps, directory_hash=None):
+        """
+        Atomically writes 'tensors' to 'path', and the file paths with their stamps to 'path'.json.
+        The lists would grow the safetensors header past its 100 MB limit for very large libraries,
+        so they are kept in a file of their own, tied to the tensors by its digest.
+        """
+        listing = json.dumps({'paths': paths, 'stamps': [stamps[p] for p in paths]}).encode()
+        metadata = {'listing_digest': hashlib.blake2b(listing, digest_size=16).hexdigest()}
+        if directory_hash is not None:
+            metadata['directory_hash'] = directory_hash
+        listing_path = f"{path}.json"
+        with open(f"{listing_path}.tmp", 'wb') as f:
+            f.write(listing)
+        os.replace(f"{listing_path}.tmp", listing_path)
+        safetensors_torch.save_file(tensors, f"{path}.tmp", metadata=metadata)
+        os.replace(f"{path}.tmp", path)
+
+    def _write_feature_cache(self, cache_path, directory_hash, features, stamps):
+        """Saves the current index as one contiguous FP16 feature tensor (plus the ANN index, if any)."""
+        tensors = {'features': features.half().cpu().contiguous()}
+        if self._ann_index is not None:
+            tensors['ann_index'] = torch.from_numpy(faiss.serialize_index(self._ann_index))
+        self._write_feature_file(cache_path, tensors, self.image_paths, stamps, directory_hash)
+
+    def _get_checkpoint_paths(self, cache_path):
+        """Returns the checkpoint files of an unfinished indexing run next to cache_path, oldest first."""
+        cache_dir, prefix = os.path.split(cache_path)
+        prefix += ".part"
+        try:
+            numbers = [name[len(prefix):] for name in os.listdir(cache_dir) if name.startswith(prefix)]
+        except OSError:
+            return []
+        return [f"{cache_path}.part{n}" for n in sorted(int(n) for n in numbers if n.isdigit())]
+
+    def _write_checkpoint(self, cache_path, index, paths, feature_batches, stamps):
+        """
+        Saves the features encoded since the last checkpoint to a small file of their own, so a
+        cancelled or crashed run can resume without the whole cache being rewritten every time.
+        """
+        self._write_feature_file(f"{cache_path}.part{index}", {'features': torch.cat(feature_batches)}, paths, stamps)
+
+    def _remove_checkpoints(self, cache_path):
+        """Deletes the checkpoint files once their features are part of the feature cache."""
+        for checkpoint_path in self._get_checkpoint_paths(cache_path):
+            for path in (checkpoint_path, f"{checkpoint_path}.json"):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Could not remove checkpoint file: {e}")
+
+    @pyqtSlot()
+    def save_query_cache(self):
+        """
+        Writes the text feature and semantic result caches next to the feature cache. The features
+        are stored as tensors; the queries and the cached results go into the file's metadata.
+        """
+        if not self.current_directory or self._directory_hash is None or not self._text_cache:
+            return
+        tensors = {'text_features': torch.cat(list(self._text_cache.values())).cpu().contiguous()}
+        if self._semantic_keys is not None:
+            tensors['semantic_keys'] = self._semantic_keys.cpu().contiguous()
+        metadata = {
+            'model_key': self.model_key,
+            'directory_hash': self._directory_hash,
+            'queries': json.dumps(list(self._text_cache)),
+            'semantic_values': json.dumps(self._semantic_values),
+        }
+        try:
+            query_cache_path = self._get_query_cache_path(self.current_directory)
+            temp_path = f"{query_cache_path}.tmp"
+            safetensors_torch.save_file(tensors, temp_path, metadata=metadata)
+            os.replace(temp_path, query_cache_path)
+        except Exception as e:
+            print(f"Could not write query cache file: {e}")
+
+    def _load_query_cache(self, image_folder):
+        """
+        Restores the query caches saved by a previous session. Text features only depend on the
+        model, but cached results are only reused if the directory hasn't changed since.
+        """
+        query_cache_path = self._get_query_cache_path(image_folder)
+        if not os.path.exists(query_cache_path):
+            return
+        try:
+            with safetensors_torch.safe_open(query_cache_path, framework="pt") as f:
+                metadata = f.metadata() or {}
+                if metadata.get('model_key') != self.model_key:
+                    return
+                queries = json.loads(metadata['queries'])
+                text_features = f.get_tensor('text_features').to(self.device)
+                semantic_keys = f.get_tensor('semantic_keys') if 'semantic_keys' in f.keys() else None
+            for query, features in zip(queries, text_features.split(1)):
+                self._text_cache[query] = features
+            while len(self._text_cache) > config.TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+            if metadata.get('directory_hash') == self._directory_hash and semantic_keys is not None:
+                self._semantic_keys = semantic_keys.to(self.device)
+                self._semantic_values = [(top_k, [tuple(result) for result in results])
+                                         for top_k, results in json.loads(metadata['semantic_values'])]
+        except Exception as e:
+            print(f"Could not read query cache file: {e}")
+
+    def _scan_directory(self, image_folder):
+        """
+        Finds all images below image_folder, like os.walk (directory symlinks aren't followed).
+        Our own cache directories, which hold thumbnails, are skipped.
+        Returns sorted (path, size, mtime_ns) tuples, using the stat data gathered while scanning.
+        """
+        found = []
+        # Listing a directory mostly waits on the file system (especially network drives),
+        # so several directories are scanned at once
+        with concurrent.futures.ThreadPoolExecutor(max_workers=config.SCAN_THREADS) as executor:
+            pending = {executor.submit(_scan_single_directory, image_folder)}
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    subdirectories, images = future.result()
+                    found.extend(images)
+                    pending.update(executor.submit(_scan_single_directory, d) for d in subdirectories)
+        found.sort()
+        return found
 
-    def _get_directory_hash(self, image_folder, all_paths):
-        """Computes a hash for the directory based on file names and mod times."""
-        hash_obj = hashlib.md5()
-        for file_path in sorted(all_paths):
-            hash_obj.update(os.path.basename(file_path).encode())
-            hash_obj.update(str(os.path.getmtime(file_path)).encode())
-        return hash_obj.hexdigest()
+    def _get_directory_hash(self, image_entries):
+        """Computes a hash for the directory based on the images' paths, sizes and mod times."""
+        buffer = "".join(f"{path}\0{size}\0{mtime_ns}\n" for path, size, mtime_ns in image_entries)
+        return hashlib.blake2b(buffer.encode(), digest_size=16).hexdigest()
+
+    def _create_image_loader(self, paths):
+        """Returns a DataLoader yielding (paths, image batch) for the given files."""
+        # Starting worker processes costs a few seconds, which only pays off for larger jobs
+        num_workers = config.INDEXING_WORKERS if len(paths) > 2 * config.BATCH_SIZE else 0
+        worker_options = {}
+        if num_workers > 0:
+            # Forking a process that runs Qt and torch threads is unsafe, so workers are spawned
+            worker_options = {'multiprocessing_context': 'spawn', 'prefetch_factor': 4}
+        return torch.utils.data.DataLoader(
+            _ImageDataset(paths, self.preprocess, raw_jpeg=self._gpu_preprocess is not None),
+            batch_size=config.BATCH_SIZE,
+            num_workers=num_workers,
+            collate_fn=_collate_images,
+            pin_memory=self.device == "cuda", # Allows asynchronous host-to-device copies
+            **worker_options
+        )
 
     @pyqtSlot(str) # <-- ADDED: Mark as a slot that takes one string argument
     def index_directory(self, image_folder):
         """The main worker function to index all images in a directory."""
         self._is_indexing = True
         try:
+            if image_folder != self.current_directory:
+                self.save_query_cache() # Keep the previous folder's query caches
             self.current_directory = image_folder
-            all_paths = [os.path.normpath(os.path.join(root, file))
-             for root, _, files in os.walk(image_folder)
-             for file in files if is_image_file(file)]
+            image_entries = self._scan_directory(image_folder)
+            all_paths = [path for path, _, _ in image_entries]
 
             if not all_paths:
                 self.error.emit("No images found in the selected directory.")
@@ -107,55 +452,104 @@ class ImageEngine(QObject):
 
             cache_path = self._get_cache_path(image_folder)
             os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-            cached_data, directory_hash = {}, self._get_directory_hash(image_folder, all_paths)
+            directory_hash = self._get_directory_hash(image_entries)
+            stamps = {path: (size, mtime_ns) for path, size, mtime_ns in image_entries}
+            positions = {path: i for i, path in enumerate(all_paths)}
+            # Features are written straight to their row in scan order. The tensor is allocated
+            # once the feature size is known; 'filled' marks the rows that have been written.
+            features, filled = None, torch.zeros(len(all_paths), dtype=torch.bool)
+            cached_paths, cached_features, cached_ann_index = None, None, None
+            checkpoint_paths = self._get_checkpoint_paths(cache_path)
 
-            if os.path.exists(cache_path):
-                try:
-                    with open(cache_path, 'rb') as f:
-                        data = pickle.load(f)
-                        if data.get('directory_hash') == directory_hash:
-                            cached_data = data.get('features', {})
-                            self.progress.emit(0, 100, f"Loaded {len(cached_data)} features from valid cache.")
-                except Exception as e:
-                    print(f"Could not read cache file: {e}")
+            cache = self._read_feature_cache(cache_path)
+            cache_is_current = cache is not None and cache[0] == directory_hash
+            if cache_is_current:
+                _, cached_paths, _, cached_features, cached_ann_index = cache
+                if cached_paths != all_paths: # Otherwise cached_features is used as is, see below
+                    features = _scatter_features(features, filled, positions, cached_paths, cached_features)
+            else:
+                # The directory changed or the last run didn't finish: keep the features of every
+                # file that is unchanged since it was encoded, from the old cache and any checkpoints
+                for stored in [cache] + [self._read_feature_cache(p) for p in checkpoint_paths]:
+                    if stored is not None:
+                        _, stored_paths, stored_stamps, stored_features, _ = stored
+                        unchanged = [i for i, (path, stamp) in enumerate(zip(stored_paths, stored_stamps))
+                                     if stamps.get(path) == stamp]
+                        if unchanged:
+                            features = _scatter_features(features, filled, positions,
+                                                         [stored_paths[i] for i in unchanged], stored_features[unchanged])
 
-            paths_to_process = [p for p in all_paths if p not in cached_data]
+            if cached_paths == all_paths:
+                paths_to_process = []
+            else:
+                paths_to_process = [p for p, done in zip(all_paths, filled.tolist()) if not done]
+            processed_count = len(all_paths) - len(paths_to_process)
+            if processed_count:
+                self.progress.emit(0, 100, f"Loaded {processed_count} features from cache.")
+            # Features encoded since the last checkpoint, see _write_checkpoint
+            checkpoint_index, pending_paths, pending_features = len(checkpoint_paths), [], []
             
             if paths_to_process:
-                with torch.no_grad():
-                    for i in range(0, len(paths_to_process), config.BATCH_SIZE):
+                with torch.inference_mode():
+                    # Images are decoded and preprocessed by the loader's worker processes
+                    # while the model encodes the previous batch.
+                    for valid_paths, batch, jpeg_paths, jpeg_data in self._create_image_loader(paths_to_process):
                         if not self._is_indexing:
+                            if pending_paths: # Keep the work done so far for the next run
+                                self._write_checkpoint(cache_path, checkpoint_index, pending_paths, pending_features, stamps)
                             self.finished.emit("Indexing cancelled.")
                             return
 
-                        batch_paths = paths_to_process[i:i + config.BATCH_SIZE]
-                        image_tensors, valid_paths = [], []
-                        for path in batch_paths:
-                            try:
-                                image = self.preprocess(Image.open(path).convert("RGB"))
-                                image_tensors.append(image)
-                                valid_paths.append(path)
-                            except Exception as e:
-                                print(f"Warning: Skipping corrupted image '{path}': {e}")
-                        
-                        if not image_tensors: continue
+                        if jpeg_paths:
+                            valid_paths, batch = self._add_gpu_decoded_jpegs(valid_paths, batch, jpeg_paths, jpeg_data)
+                        if batch is None: continue
 
-                        batch_features = self.model.encode_image(torch.stack(image_tensors).to(self.device))
-                        batch_features /= batch_features.norm(dim=-1, keepdim=True)
+                        # Stored as FP16 to halve cache size and copy time
+                        batch_features = self._encode_images(batch).half().cpu()
                         
-                        for path, feature in zip(valid_paths, batch_features.cpu()):
-                            cached_data[path] = feature
+                        features = _scatter_features(features, filled, positions, valid_paths, batch_features)
+                        pending_paths.extend(valid_paths)
+                        pending_features.append(batch_features)
+                        if len(pending_features) >= config.CACHE_CHECKPOINT_BATCHES:
+                            self._write_checkpoint(cache_path, checkpoint_index, pending_paths, pending_features, stamps)
+                            checkpoint_index, pending_paths, pending_features = checkpoint_index + 1, [], []
                         
-                        processed_count = len(cached_data)
+                        processed_count += len(valid_paths)
                         self.progress.emit(processed_count, len(all_paths), f"Indexing: {processed_count}/{len(all_paths)}")
 
-            with open(cache_path, 'wb') as f:
-                pickle.dump({'features': cached_data, 'directory_hash': directory_hash}, f)
-            
-            self.image_paths = all_paths
-            ordered_features = [cached_data.get(p) for p in self.image_paths]
-            self.image_paths = [p for i, p in enumerate(self.image_paths) if ordered_features[i] is not None]
-            self.image_features = torch.stack([f for f in ordered_features if f is not None]).to(self.device)
+            if cached_paths == all_paths:
+                # Everything came from the cache: use its feature tensor as is
+                self.image_paths = cached_paths
+                features = cached_features
+            elif features is None:
+                self.error.emit("None of the images in the selected directory could be read.")
+                return
+            else:
+                filled_rows = filled.tolist()
+                self.image_paths = [p for p, done in zip(all_paths, filled_rows) if done]
+                if not all(filled_rows): # Leave out the images that couldn't be read
+                    features = features[filled]
+            self._path_to_idx = {p: i for i, p in enumerate(self.image_paths)}
+            # Normalized features lose nothing meaningful in 16 bits, and keeping them that way halves
+            # the memory traffic of every search. CPUs lack fast FP16 matmuls, and BF16 scores are too
+            # coarse to rank near-ties or display, so the CPU searches in FP32.
+            feature_dtype = torch.float16 if self.device == "cuda" else torch.float32
+            self.image_features = features.to(self.device, dtype=feature_dtype)
+
+            # A cached ANN index is only valid if it was built over exactly these images, in this order.
+            # paths_to_process alone doesn't mean a change: unreadable images are retried on every run.
+            if cached_paths != self.image_paths:
+                cached_ann_index = None
+            self._ann_index = self._build_ann_index(cached_ann_index)
+
+            # Only rewrite the cache if something changed since it was written
+            if (not cache_is_current or cached_paths != self.image_paths
+                    or (self._ann_index is not None and cached_ann_index is None)):
+                self._write_feature_cache(cache_path, directory_hash, features, stamps)
+            self._remove_checkpoints(cache_path)
+            self._clear_semantic_cache() # Cached results refer to the previous index
+            self._directory_hash = directory_hash
+            self._load_query_cache(image_folder)
             
             self.finished.emit(f"Indexing complete. {len(self.image_paths)} images ready.")
 
@@ -164,7 +558,155 @@ class ImageEngine(QObject):
         finally:
             self._is_indexing = False
 
-    def search(self, query, top_k):
+    def _get_gpu_preprocess(self):
+        """
+        Returns the parameters for decoding and preprocessing JPEGs on the GPU with nvJPEG, or None
+        if that isn't possible: not on CUDA, disabled in config, or the model's preprocessing
+        contains steps other than resize, center crop and normalize.
+        """
+        if self.device != "cuda" or not config.GPU_JPEG_DECODE:
+            return None
+        transforms = torchvision.transforms
+        resize = interpolation = crop = mean = std = None
+        for transform in getattr(self.preprocess, 'transforms', ()):
+            if isinstance(transform, transforms.Resize):
+                resize, interpolation = transform.size, transform.interpolation
+            elif isinstance(transform, transforms.CenterCrop):
+                crop = transform.size
+            elif isinstance(transform, transforms.Normalize):
+                mean, std = transform.mean, transform.std
+            elif not isinstance(transform, transforms.ToTensor) and not inspect.isfunction(transform):
+                return None # Plain functions are conversions to RGB, which nvJPEG does while decoding
+        if resize is None or crop is None or mean is None:
+            return None
+        mean = torch.tensor(mean, device=self.device).view(3, 1, 1)
+        std = torch.tensor(std, device=self.device).view(3, 1, 1)
+        self._gpu_preprocess = resize, interpolation, crop, mean, std
+        try:
+            # Older torchvision versions lack some of the GPU kernels
+            self._preprocess_on_gpu(torch.zeros((3, 16, 16), dtype=torch.uint8, device=self.device))
+        except Exception as e:
+            print(f"GPU image preprocessing is unavailable, decoding on the CPU: {e}")
+            return None
+        return self._gpu_preprocess
+
+    def _preprocess_on_gpu(self, image):
+        """Applies the model's preprocessing to a decoded (3, H, W) uint8 image on the GPU."""
+        resize, interpolation, crop, mean, std = self._gpu_preprocess
+        image = torchvision.transforms.functional.resize(image.float(), resize, interpolation=interpolation, antialias=True)
+        image = torchvision.transforms.functional.center_crop(image.clamp_(0, 255), crop)
+        return (image / 255 - mean) / std
+
+    def _add_gpu_decoded_jpegs(self, paths, batch, jpeg_paths, jpeg_data):
+        """
+        Decodes the raw JPEG files with nvJPEG, preprocesses them on the GPU and appends them
+        to the batch. Files nvJPEG can't handle (e.g. CMYK JPEGs) are decoded on the CPU instead.
+        Returns the combined (paths, batch) with the batch on the GPU, or ([], None) if nothing was readable.
+        """
+        paths, images = list(paths), [] if batch is None else [batch.to(self.device, non_blocking=True)]
+        read_mode = torchvision.io.ImageReadMode.RGB
+        # Full resolution photos take a lot of VRAM, so only a few are decoded at a time
+        for start in range(0, len(jpeg_paths), config.GPU_JPEG_DECODE_CHUNK):
+            chunk_paths = jpeg_paths[start:start + config.GPU_JPEG_DECODE_CHUNK]
+            chunk_data = jpeg_data[start:start + config.GPU_JPEG_DECODE_CHUNK]
+            try:
+                decoded = torchvision.io.decode_jpeg(chunk_data, mode=read_mode, device=self.device)
+            except Exception:
+                # A single bad file fails the whole call (as do older torchvision versions, which
+                # only take one image), so retry them one at a time
+                decoded = []
+                for data in chunk_data:
+                    try:
+                        decoded.append(torchvision.io.decode_jpeg(data, mode=read_mode, device=self.device))
+                    except Exception:
+                        decoded.append(None)
+            for path, image in zip(chunk_paths, decoded):
+                if image is not None:
+                    image = self._preprocess_on_gpu(image)
+                else:
+                    image = _preprocess_image(path, self.preprocess)
+                    if image is None:
+                        continue
+                    image = image.to(self.device)
+                paths.append(path)
+                images.append(image.unsqueeze(0))
+        if not images:
+            return [], None
+        return paths, torch.cat(images)
+
+    def _encode_images(self, batch):
+        """Encodes a batch of preprocessed images into L2-normalized FP32 features."""
+        batch = batch.to(self.device, non_blocking=True).contiguous(memory_format=torch.channels_last)
+        # Half precision on CUDA runs the matmuls on Tensor Cores at a fraction of the cost
+        with torch.autocast(device_type="cuda", dtype=torch.float16, enabled=self.device == "cuda"):
+            features = self.model.encode_image(batch)
+        return torch.nn.functional.normalize(features.float(), dim=-1)
+
+    def _build_ann_index(self, serialized_index=None):
+        """
+        Returns a FAISS IVF-PQ index over self.image_features, restored from serialized_index if given.
+        Returns None if faiss isn't installed or the library is small enough for an exact search.
+        The index uses 4-bit "fast scan" codes, whose distance lookups run as SIMD shuffles;
+        its coarse ranking is refined by _nearest against the full feature vectors.
+        """
+        count, dim = self.image_features.shape
+        if faiss is None or count < config.ANN_INDEX_MIN_IMAGES:
+            return None
+        if serialized_index is not None:
+            index = faiss.deserialize_index(serialized_index)
+        else:
+            self.progress.emit(0, 100, f"Building search index for {count} images...")
+            vectors = self.image_features.float().cpu().numpy()
+            nlist = int(4 * math.sqrt(count)) # Number of inverted lists (clusters)
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQFastScan(quantizer, dim, nlist, config.ANN_INDEX_PQ_SUBVECTORS, 4,
+                                             faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.add(vectors)
+        index.nprobe = config.ANN_INDEX_NPROBE
+        return index
+
+    def _nearest(self, query_features, top_k, exclude=None):
+        """
+        Returns [(score, path)] for the top_k indexed images most similar to the query features,
+        best first. 'exclude' is an index position to leave out (the query image itself).
+        """
+        query_vector = query_features.to(self.image_features.dtype).squeeze(0)
+        if self._ann_index is not None:
+            # Fetch a few times more candidates than needed from the (approximate) index,
+            # then rank those exactly against their full feature vectors.
+            extra = 0 if exclude is None else 1
+            _, indices = self._ann_index.search(query_features.float().cpu().numpy(),
+                                                (top_k + extra) * config.ANN_RERANK_FACTOR)
+            # faiss pads with -1 when fewer candidates are found
+            candidates = [idx for idx in indices[0].tolist() if idx >= 0 and idx != exclude]
+            if not candidates:
+                return []
+            candidates = torch.tensor(candidates, device=self.image_features.device)
+            similarities = self.image_features[candidates] @ query_vector
+            top_results = torch.topk(similarities, k=min(top_k, len(candidates)))
+            pairs = zip(top_results.values.tolist(), candidates[top_results.indices].tolist())
+        else:
+            # A matrix-vector product yields the (N,) scores directly (even when N == 1)
+            similarities = self.image_features @ query_vector
+            # Ask for one more result and drop the excluded image afterwards, rather than
+            # overwriting its score in the similarity vector first
+            extra = 0 if exclude is None else 1
+            top_results = torch.topk(similarities, k=min(top_k + extra, len(self.image_paths)))
+            pairs = [(score, idx) for score, idx in zip(top_results.values.tolist(), top_results.indices.tolist())
+                     if idx != exclude][:top_k]
+        return [(score, self.image_paths[idx]) for score, idx in pairs]
+
+    @pyqtSlot(str, int)
+    def do_search(self, query, top_k):
+        """Runs a search on the worker thread and emits the results via search_results_ready."""
+        self.search_results_ready.emit(self._search(query, top_k))
+
+    def _search(self, query, top_k):
+        """
+        Searches by image if query is an existing file path, by text otherwise. Private so the GUI
+        can't run it synchronously on its own thread; it goes through the queued do_search slot.
+        """
         if self.image_features is None:
             self.error.emit("Please index a directory before searching.")
             return []
@@ -175,28 +717,92 @@ class ImageEngine(QObject):
             return self._search_by_text(query, top_k)
         return []
 
+    def _encode_text(self, text_query):
+        """Returns the normalized text features for a query, reusing them for repeated queries."""
+        return self._encode_texts([text_query])[0]
+
+    def _encode_texts(self, text_queries):
+        """
+        Returns the normalized (1, dim) text features of each query. Queries that aren't cached
+        yet are tokenized and encoded together in a single batch.
+        """
+        missing = [q for q in dict.fromkeys(text_queries) if q not in self._text_cache]
+        if missing:
+            text = open_clip.tokenize(missing).to(self.device)
+            features = torch.nn.functional.normalize(self.model.encode_text(text), dim=-1)
+            for query, query_features in zip(missing, features.split(1)):
+                self._text_cache[query] = query_features
+        results = []
+        for query in text_queries:
+            self._text_cache.move_to_end(query)
+            results.append(self._text_cache[query])
+        while len(self._text_cache) > config.TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+        return results
+
+    def _clear_semantic_cache(self):
+        self._semantic_keys = None
+        self._semantic_values = []
+
+    def _lookup_semantic_cache(self, query_features, top_k):
+        """
+        Returns the cached results of a previous query whose text features are nearly
+        identical to this one (e.g. a paraphrase), or None if there is no such query.
+        """
+        if self._semantic_keys is None:
+            return None
+        similarities = (self._semantic_keys @ query_features.T).squeeze(1)
+        # Only entries holding at least top_k results can answer this query
+        usable = torch.tensor([cached_top_k >= top_k for cached_top_k, _ in self._semantic_values],
+                              device=similarities.device)
+        similarities = similarities.masked_fill(~usable, -math.inf)
+        best = int(torch.argmax(similarities))
+        if similarities[best].item() >= config.SEMANTIC_CACHE_THRESHOLD:
+            return self._semantic_values[best][1][:top_k]
+        return None
+
+    def _store_semantic_cache(self, query_features, top_k, results):
+        """
+        Remembers the results of a query, evicting the oldest entry when the cache is full.
+        Entries the query matches hold fewer results (or the lookup would have hit), so they are replaced.
+        """
+        if self._semantic_keys is not None:
+            similarities = (self._semantic_keys @ query_features.T).squeeze(1)
+            keep = similarities < config.SEMANTIC_CACHE_THRESHOLD
+            self._semantic_values = [value for value, kept in zip(self._semantic_values, keep.tolist()) if kept]
+            self._semantic_keys = self._semantic_keys[keep] if self._semantic_values else None
+        if self._semantic_keys is None:
+            self._semantic_keys = query_features
+        else:
+            self._semantic_keys = torch.cat([self._semantic_keys, query_features])
+        self._semantic_values.append((top_k, results))
+        if len(self._semantic_values) > config.SEMANTIC_CACHE_SIZE:
+            self._semantic_keys = self._semantic_keys[1:]
+            self._semantic_values.pop(0)
+
     def _search_by_text(self, text_query, top_k):
-        with torch.no_grad():
-            text = open_clip.tokenize([text_query]).to(self.device)
-            query_features = self.model.encode_text(text)
-            query_features /= query_features.norm(dim=-1, keepdim=True)
-            
-            similarities = (self.image_features @ query_features.T).squeeze()
-            top_results = torch.topk(similarities, k=min(top_k, len(self.image_paths)))
+        with torch.inference_mode():
+            query_features = self._encode_text(text_query)
+            cached_results = self._lookup_semantic_cache(query_features, top_k)
+            if cached_results is not None:
+                return cached_results
             
-            return [(score.item(), self.image_paths[idx]) for score, idx in zip(top_results.values, top_results.indices)]
+            results = self._nearest(query_features, top_k)
+            self._store_semantic_cache(query_features, top_k, results)
+            return results
 
     def _search_by_image(self, image_path, top_k):
-        try:
-            query_idx = self.image_paths.index(image_path)
-            query_features = self.image_features[query_idx].unsqueeze(0)
-        except (ValueError, IndexError):
-            self.error.emit(f"Query image '{os.path.basename(image_path)}' not found in index.")
-            return []
-            
-        similarities = (self.image_features @ query_features.T).squeeze()
-        similarities[query_idx] = -1.0
-        
-        top_results = torch.topk(similarities, k=min(top_k, len(self.image_paths) - 1))
-        
-        return [(score.item(), self.image_paths[idx]) for score, idx in zip(top_results.values, top_results.indices)]
+        with torch.inference_mode():
+            query_idx = self._path_to_idx.get(image_path)
+            if query_idx is not None:
+                query_features = self.image_features[query_idx].unsqueeze(0)
+            else:
+                # Images from outside the index (e.g. dropped from elsewhere) are encoded on the fly
+                try:
+                    image = self.preprocess(Image.open(image_path).convert("RGB"))
+                except Exception as e:
+                    self.error.emit(f"Could not read query image '{os.path.basename(image_path)}'.\nError: {e}")
+                    return []
+                query_features = self._encode_images(image.unsqueeze(0))
+
+            return self._nearest(query_features, top_k, exclude=query_idx)
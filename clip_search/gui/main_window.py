@@ -2,11 +2,28 @@
 
 import sys
 import os
+import subprocess
+import hashlib
+import collections
+import functools
+import itertools
+import threading
 from PyQt5 import QtWidgets, QtGui, QtCore
 
 # Import our custom modules
 from clip_search import config
-from clip_search.core.image_engine import ImageEngine
+from clip_search.core.image_engine import ImageEngine, is_image_file
+
+# The model list never changes at runtime, so it is only materialized once
+_MODEL_ITEMS = tuple(config.AVAILABLE_MODELS.items())
+
+@functools.lru_cache(maxsize=64)
+def _themed_icon(name):
+    """
+    Returns QIcon.fromTheme(name), looking each name up only once.
+    Theme lookups probe the icon theme directories on disk. Only call this from the GUI thread.
+    """
+    return QtGui.QIcon.fromTheme(name)
 
 class ImageDropLabel(QtWidgets.QLabel):
     """A custom QLabel that accepts image file drops."""
@@ -40,7 +57,6 @@ class ImageDropLabel(QtWidgets.QLabel):
             # Get the path of the first file
             file_path = event.mimeData().urls()[0].toLocalFile()
             # Check if the file is a supported image type
-            from clip_search.core.image_engine import is_image_file # Local import to avoid circular dependency
             if is_image_file(file_path):
                 event.acceptProposedAction()
                 self.setProperty("is_active", "true") # Set a property for styling
@@ -58,51 +74,220 @@ class ImageDropLabel(QtWidgets.QLabel):
         self.style().polish(self)
         self.image_dropped.emit(file_path) # Emit the signal with the file path
         
-class ThumbnailWorker(QtCore.QObject):
-    """A worker that generates QListWidgetItems with thumbnails in the background."""
-    finished = QtCore.pyqtSignal(list) # Signal will emit the list of generated items
-
-    def __init__(self, results, parent=None):
-        super().__init__(parent)
-        self.results = results
+def _thumbnail_cache_path(thumb_dir, path):
+    """
+    Returns the cache file for a thumbnail of 'path'.
+    The source's mtime and size are part of the name, so an edited image never hits a stale entry.
+    """
+    key = hashlib.sha1(path.encode()).hexdigest()
+    stat = os.stat(path)
+    return os.path.join(thumb_dir, f"{key}_{stat.st_mtime_ns}_{stat.st_size}_{config.THUMBNAIL_SIZE}.jpg")
+
+# Counts thumbnails written to the cache, so only every THUMBNAIL_CACHE_TRIM_INTERVAL-th write trims it
+_thumbnail_writes = itertools.count(1)
+
+def _trim_thumbnail_cache(thumb_dir, max_entries):
+    """Deletes the least recently used thumbnails once the cache holds more than max_entries files."""
+    try:
+        entries = [entry for entry in os.scandir(thumb_dir) if entry.is_file()]
+        if len(entries) <= max_entries:
+            return
+        # Cache hits touch their file, so the mtime doubles as a "last used" stamp.
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - max_entries]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"Could not trim thumbnail cache: {e}")
+
+def _load_thumbnail(thumb_dir, path):
+    """
+    Returns a thumbnail-sized QImage, reading it from the on-disk cache when possible.
+    QImage (unlike QPixmap) is safe to use outside the GUI thread. The image is always in
+    Format_RGB32, so QPixmap.fromImage on the GUI thread is a plain copy without conversion.
+    """
+    thumb_path = _thumbnail_cache_path(thumb_dir, path)
+    image = QtGui.QImage(thumb_path) # Null if it isn't cached yet, no need to stat the file first
+    if not image.isNull():
+        try:
+            os.utime(thumb_path) # Mark as recently used for the LRU trim
+        except OSError as e: # e.g. a read-only cache, or the trim just removed the file
+            print(f"Could not update thumbnail cache entry: {e}")
+        return image.convertToFormat(QtGui.QImage.Format_RGB32)
+
+    # Ask the JPEG decoder for the thumbnail size directly. It uses libjpeg's reduced-size IDCT,
+    # so the full-resolution image is never materialized. Other handlers that claim ScaledSize
+    # support (e.g. PNG) just decode fully and scale with the slow smooth filter.
+    reader = QtGui.QImageReader(path)
+    reader.setAutoTransform(True) # Honor EXIF orientation
+    size = reader.size()
+    decoder_scales = size.isValid() and bytes(reader.format()).lower() in (b"jpeg", b"jpg")
+    if decoder_scales:
+        size.scale(config.THUMBNAIL_SIZE, config.THUMBNAIL_SIZE, QtCore.Qt.KeepAspectRatio)
+        reader.setScaledSize(size)
+    image = reader.read()
+    if image.isNull():
+        return image
+    if not decoder_scales:
+        # Other formats are scaled here rather than by QImageReader, which would use the
+        # (much slower) smooth filter. At thumbnail size the difference isn't visible.
+        image = image.scaled(config.THUMBNAIL_SIZE, config.THUMBNAIL_SIZE,
+                             QtCore.Qt.KeepAspectRatio, QtCore.Qt.FastTransformation)
+    image = image.convertToFormat(QtGui.QImage.Format_RGB32)
+
+    # Two pool threads may render the same file (e.g. for consecutive searches),
+    # so write to a private temporary file and move it into place atomically.
+    # The cache is only an optimization: failing to write it must not lose the thumbnail.
+    temp_path = f"{thumb_path}.{threading.get_ident()}.tmp"
+    try:
+        if image.save(temp_path, "JPG", 85):
+            os.replace(temp_path, thumb_path)
+            # Listing the cache is costly, and it only grows when thumbnails are written
+            if next(_thumbnail_writes) % config.THUMBNAIL_CACHE_TRIM_INTERVAL == 0:
+                _trim_thumbnail_cache(thumb_dir, config.THUMBNAIL_CACHE_MAX_ENTRIES)
+    except OSError as e:
+        print(f"Could not write thumbnail cache entry: {e}")
+    return image
+
+class ThumbnailSignals(QtCore.QObject):
+    """Carries finished thumbnails from ThumbnailTask back to the UI thread (QRunnable can't emit signals)."""
+    ready = QtCore.pyqtSignal(int, int, str, QtGui.QImage) # generation, row, path, thumbnail
+
+class ThumbnailTask(QtCore.QRunnable):
+    """Decodes and scales a single result image on the thread pool."""
+
+    def __init__(self, generation, row, path, thumb_dir, signals):
+        super().__init__()
+        self.generation = generation
+        self.row = row
+        self.path = path
+        self.thumb_dir = thumb_dir
+        self.signals = signals
 
-    @QtCore.pyqtSlot()
     def run(self):
-        """Processes the search results and creates widget items."""
-        items = []
-        for score, path in self.results:
-            try:
-                pixmap = QtGui.QPixmap(path)
-                icon = QtGui.QIcon(pixmap.scaled(config.THUMBNAIL_SIZE, config.THUMBNAIL_SIZE,
-                                                QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
-                
-                # We can't create a QListWidgetItem here because it's a GUI object.
-                # Instead, we prepare all the data needed to create it.
-                item_data = {
-                    'icon': icon,
-                    'text': f"Score: {score:.3f}",
-                    'tooltip': f"{os.path.basename(path)}\nScore: {score:.3f}",
-                    'path': path
-                }
-                items.append(item_data)
-            except Exception as e:
-                print(f"Error creating thumbnail for {path}: {e}")
-        
-        self.finished.emit(items)
+        try:
+            image = _load_thumbnail(self.thumb_dir, self.path)
+        except Exception as e:
+            print(f"Error creating thumbnail for {self.path}: {e}")
+            return
+        self.signals.ready.emit(self.generation, self.row, self.path, image)
+
+class ResultsModel(QtCore.QAbstractListModel):
+    """
+    A list model over (score, path) search results.
+    Thumbnails are decoded lazily: only when the view asks for a row's icon, i.e. when it scrolls into view.
+    """
+
+    def __init__(self, thread_pool, parent=None):
+        super().__init__(parent)
+        self._pool = thread_pool
+        self._results = []
+        self._thumb_dir = None
+        self._icons = collections.OrderedDict() # path -> QIcon, in least-recently-used order
+        self._pending = set() # Paths with a decode task in flight
+        self._generation = 0 # Bumped for every new result set, so late thumbnails of older ones are ignored
+        self._placeholder = None
+        self._signals = ThumbnailSignals()
+        self._signals.ready.connect(self._on_thumbnail_ready)
+
+    def set_results(self, results, thumb_dir=None):
+        """
+        Replaces the displayed results. No thumbnails are decoded until the view requests them.
+        Thumbnails of the previous results that haven't started decoding yet are cancelled.
+        Decoded icons are kept, since consecutive searches (e.g. a larger result count) mostly overlap.
+        """
+        self._pool.clear()
+        self._generation += 1
+        self.beginResetModel()
+        self._results = self._format_results(results)
+        self._thumb_dir = thumb_dir
+        self._pending.clear()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_results([])
+
+    @staticmethod
+    def _format_results(results):
+        """
+        Builds the (path, label, tooltip) rows for the view once, rather than formatting
+        them in data(), which the view calls for every row on every repaint.
+        """
+        basename = os.path.basename
+        rows = []
+        for score, path in results:
+            score_text = format(score, '.3f')
+            rows.append((path, f"Score: {score_text}", f"{basename(path)}\nScore: {score_text}"))
+        return rows
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._results)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._results):
+            return None
+        path, text, tooltip = self._results[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return text
+        if role == QtCore.Qt.ToolTipRole:
+            return tooltip
+        if role == QtCore.Qt.UserRole:
+            return path
+        if role == QtCore.Qt.DecorationRole:
+            return self._icon_for(index.row(), path)
+        return None
+
+    def _icon_for(self, row, path):
+        """Returns the cached thumbnail, or a placeholder while a decode task is started for it."""
+        icon = self._icons.get(path)
+        if icon is not None:
+            self._icons.move_to_end(path)
+            return icon
+        if path not in self._pending:
+            self._pending.add(path)
+            self._pool.start(ThumbnailTask(self._generation, row, path, self._thumb_dir, self._signals))
+        return self._placeholder_icon()
+
+    @QtCore.pyqtSlot(int, int, str, QtGui.QImage)
+    def _on_thumbnail_ready(self, generation, row, path, image):
+        """
+        Receives a finished thumbnail from the thread pool and tells the view to repaint its row.
+        This method runs on the main UI thread, where QPixmap may be created.
+        """
+        # Failed decodes keep the placeholder so the view doesn't retry them on every repaint
+        icon = self._placeholder_icon() if image.isNull() else QtGui.QIcon(QtGui.QPixmap.fromImage(image))
+        self._icons[path] = icon
+        while len(self._icons) > config.RESULTS_ICON_CACHE_SIZE:
+            self._icons.popitem(last=False)
+
+        # If the results were replaced by a newer search in the meantime the icon is
+        # cached for later, but the row it was requested for no longer exists.
+        if generation != self._generation:
+            return
+        self._pending.discard(path)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DecorationRole])
+
+    def _placeholder_icon(self):
+        """Returns a plain gray icon shown while a thumbnail is still loading."""
+        if self._placeholder is None:
+            pixmap = QtGui.QPixmap(config.THUMBNAIL_SIZE, config.THUMBNAIL_SIZE)
+            pixmap.fill(QtGui.QColor("#e0e0e0"))
+            self._placeholder = QtGui.QIcon(pixmap)
+        return self._placeholder
 
 class MainWindow(QtWidgets.QMainWindow):
     """The main application window."""
 
-    # Define a custom signal that will carry the search results
-    # This is necessary to pass complex data types (like a list) from the worker thread
-    search_results_ready = QtCore.pyqtSignal(list)
-
     def __init__(self):
         super().__init__()
         
         self.is_first_load = True
 
-        self.thumbnail_thread = None
+        # A single settings object for the whole session; QSettings parses its backing store on construction.
+        # The arguments are your organization and application name, so settings land in a unique, standard location.
+        self._settings = QtCore.QSettings("MyCompany", config.APP_NAME)
+        self._settings.setFallbacksEnabled(False) # Don't consult system-wide/organization-wide settings
+
         # --- Worker Thread Setup ---
         # 1. Create an ImageEngine instance (our worker object)
         self.engine = ImageEngine()
@@ -114,19 +299,26 @@ class MainWindow(QtWidgets.QMainWindow):
         self.engine.progress.connect(self.update_progress)
         self.engine.finished.connect(self.on_task_finished)
         self.engine.error.connect(self.show_error_message)
+        self.engine.search_results_ready.connect(self.display_results)
         # 5. Connect the thread's start signal to a task (e.g., loading the model)
         self.worker_thread.started.connect(self.load_initial_model)
         # 6. Start the thread. It will now run its own event loop.
         self.worker_thread.start()
-
-        # Connect our custom signal for search results
-        self.search_results_ready.connect(self.display_results)
         
         # --- UI Initialization ---
         self.current_directory = None
         self._init_ui()
         self.set_ui_enabled(False) # Disable most UI elements until a directory is chosen
         self._load_settings() # Restore previous session's state
+
+    def _create_thumbnail_pool(self):
+        """
+        Creates the thread pool that decodes result thumbnails. Its threads are kept alive
+        for the whole session instead of being torn down and recreated between searches.
+        """
+        pool = QtCore.QThreadPool(self)
+        pool.setExpiryTimeout(-1)
+        return pool
         
     def _init_ui(self):
         """Initializes all widgets and layouts."""
@@ -141,7 +333,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # --- Top Controls Layout ---
         top_controls_layout = QtWidgets.QHBoxLayout()
-        self.dir_button = QtWidgets.QPushButton(QtGui.QIcon.fromTheme("folder"), "Select Image Directory")
+        self.dir_button = QtWidgets.QPushButton(_themed_icon("folder"), "Select Image Directory")
         self.dir_button.clicked.connect(self.select_directory)
         top_controls_layout.addWidget(self.dir_button)
 
@@ -152,7 +344,7 @@ class MainWindow(QtWidgets.QMainWindow):
         top_controls_layout.addWidget(self.model_combo)
         top_controls_layout.addStretch()
         
-        self.cancel_button = QtWidgets.QPushButton(QtGui.QIcon.fromTheme("process-stop"), "Cancel Indexing")
+        self.cancel_button = QtWidgets.QPushButton(_themed_icon("process-stop"), "Cancel Indexing")
         self.cancel_button.clicked.connect(self.handle_cancel_click)
         self.cancel_button.setEnabled(False)
         top_controls_layout.addWidget(self.cancel_button)
@@ -161,8 +353,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # --- Search Controls Layout ---
         # --- Search Controls Layout (NEW VERSION) ---
-        search_groupbox = QtWidgets.QGroupBox("Search")
-        search_layout = QtWidgets.QHBoxLayout(search_groupbox)
+        # Enabled and disabled as a whole by set_ui_enabled
+        self.search_groupbox = QtWidgets.QGroupBox("Search")
+        search_layout = QtWidgets.QHBoxLayout(self.search_groupbox)
 
         # Left side: Text Search
         text_search_layout = QtWidgets.QVBoxLayout()
@@ -170,7 +363,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.search_input.setPlaceholderText("Enter a text description to search for...")
         self.search_input.returnPressed.connect(self.search_by_text)
         text_search_layout.addWidget(self.search_input)
-        self.search_text_button = QtWidgets.QPushButton(QtGui.QIcon.fromTheme("edit-find"), "Find by Text")
+        self.search_text_button = QtWidgets.QPushButton(_themed_icon("edit-find"), "Find by Text")
         self.search_text_button.clicked.connect(self.search_by_text)
         text_search_layout.addWidget(self.search_text_button)
         search_layout.addLayout(text_search_layout, stretch=3) # Give text search more space
@@ -190,7 +383,7 @@ class MainWindow(QtWidgets.QMainWindow):
         image_search_layout.addWidget(self.image_drop_zone)
 
         # We still keep the button for accessibility
-        self.search_image_button = QtWidgets.QPushButton(QtGui.QIcon.fromTheme("system-search"), "... or Find by Clicking")
+        self.search_image_button = QtWidgets.QPushButton(_themed_icon("system-search"), "... or Find by Clicking")
         self.search_image_button.clicked.connect(self.select_and_search_by_image)
         image_search_layout.addWidget(self.search_image_button)
         search_layout.addLayout(image_search_layout, stretch=2) # Give image search less space
@@ -205,15 +398,24 @@ class MainWindow(QtWidgets.QMainWindow):
         results_count_layout.addStretch()
         search_layout.addLayout(results_count_layout)
 
-        main_layout.addWidget(search_groupbox)
+        main_layout.addWidget(self.search_groupbox)
 
         # --- Results Display ---
-        self.results_list = QtWidgets.QListWidget()
-        self.results_list.setViewMode(QtWidgets.QListWidget.IconMode)
+        self.thumbnail_pool = self._create_thumbnail_pool()
+        self.results_model = ResultsModel(self.thumbnail_pool, self)
+        self.results_list = QtWidgets.QListView()
+        self.results_list.setModel(self.results_model)
+        self.results_list.setViewMode(QtWidgets.QListView.IconMode)
         self.results_list.setIconSize(QtCore.QSize(config.THUMBNAIL_SIZE, config.THUMBNAIL_SIZE))
-        self.results_list.setResizeMode(QtWidgets.QListWidget.Adjust)
+        self.results_list.setResizeMode(QtWidgets.QListView.Adjust)
         self.results_list.setSpacing(config.RESULTS_GRID_SPACING)
-        self.results_list.itemDoubleClicked.connect(self.open_image_in_viewer)
+        # Every cell has the same icon size and score label, so layout can skip per-item size hints
+        # and proceed in batches. Static movement avoids drag-to-reorder bookkeeping.
+        self.results_list.setUniformItemSizes(True)
+        self.results_list.setLayoutMode(QtWidgets.QListView.Batched)
+        self.results_list.setBatchSize(50)
+        self.results_list.setMovement(QtWidgets.QListView.Static)
+        self.results_list.doubleClicked.connect(self.open_image_in_viewer)
         self.results_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.results_list.customContextMenuRequested.connect(self.show_results_context_menu)
         main_layout.addWidget(self.results_list)
@@ -226,13 +428,16 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def _populate_models_combo(self):
         """Fills the model selection dropdown from config."""
-        for name, details in config.AVAILABLE_MODELS.items():
+        for name, details in _MODEL_ITEMS:
             self.model_combo.addItem(name, userData=details['notes'])
         self.model_combo.setCurrentText(config.DEFAULT_MODEL_KEY)
         self.model_combo.setToolTip(config.AVAILABLE_MODELS[config.DEFAULT_MODEL_KEY]['notes'])
-        self.model_combo.currentIndexChanged.connect(
-            lambda: self.model_combo.setToolTip(self.model_combo.currentData())
-        )
+        self.model_combo.currentIndexChanged.connect(self.update_model_tooltip)
+
+    @QtCore.pyqtSlot(int)
+    def update_model_tooltip(self, index):
+        """Shows the selected model's notes as the dropdown's tooltip."""
+        self.model_combo.setToolTip(self.model_combo.itemData(index))
 
     # --- Major Action Slots ---
 
@@ -248,7 +453,7 @@ class MainWindow(QtWidgets.QMainWindow):
         folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Image Directory")
         if folder:
             self.current_directory = folder
-            self.results_list.clear()
+            self.results_model.clear()
             self.setWindowTitle(f"{config.APP_NAME} - {os.path.basename(folder)}")
             self.set_ui_enabled(False, is_indexing=True)
             # Call the 'index_directory' method on the engine object in the worker thread
@@ -260,7 +465,7 @@ class MainWindow(QtWidgets.QMainWindow):
         """Loads a new model when selected from the dropdown."""
         if not model_key: return
         self.set_ui_enabled(False)
-        self.results_list.clear()
+        self.results_model.clear()
         self.engine.image_features = None # Invalidate old index
         QtCore.QMetaObject.invokeMethod(self.engine, "load_model", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, model_key))
 
@@ -279,8 +484,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.current_directory:
             # We use the current directory to start the file dialog
             query, _ = QtWidgets.QFileDialog.getOpenFileName(
-                self, "Select Query Image", self.current_directory,
-                f"Images ({' '.join(['*' + ext for ext in config.IMAGE_EXTENSIONS])})"
+                self, "Select Query Image", self.current_directory, config.IMAGE_DIALOG_FILTER
             )
             if query:
                 query = os.path.normpath(query) # Normalize the path from the dialog
@@ -316,27 +520,16 @@ class MainWindow(QtWidgets.QMainWindow):
     def _start_search(self, query, top_k):
         """
         Helper to run a search on the worker thread.
-        It calls the engine's search method and ensures the result is emitted
-        via the search_results_ready signal.
+        The engine replies with its search_results_ready signal, which is connected to display_results.
         """
         
         if self.engine._is_indexing:
             self.show_error_message("Please wait for the current indexing task to complete before starting a search.")
             return
     
-        # This is a cleaner way to invoke a method on a worker thread
-        # and have it perform a task. It's more readable than a lambda in a timer.
-        QtCore.QMetaObject.invokeMethod(
-            self,  # The target object to emit the final signal
-            "__emit_search_results", # The method to call on this object
-            QtCore.Qt.QueuedConnection, # Ensure it runs in the UI thread
-            QtCore.Q_ARG(list, self.engine.search(query, top_k)) # The argument is the *result* of the search
-        )
-
-    @QtCore.pyqtSlot(list)
-    def __emit_search_results(self, results):
-        """Internal slot to safely emit the search results signal."""
-        self.search_results_ready.emit(results)
+        # Queue the search on the worker thread so encoding and scoring never block the UI
+        QtCore.QMetaObject.invokeMethod(self.engine, "do_search", QtCore.Qt.QueuedConnection,
+                                        QtCore.Q_ARG(str, query), QtCore.Q_ARG(int, top_k))
     
     @QtCore.pyqtSlot()
     def handle_cancel_click(self):
@@ -352,64 +545,44 @@ class MainWindow(QtWidgets.QMainWindow):
     @QtCore.pyqtSlot(list)
     def display_results(self, results):
         """
-        Receives search results and starts a background worker to generate thumbnails.
+        Hands the search results to the results model. Thumbnails are decoded
+        on the thread pool as their rows become visible.
         """
-        self.results_list.clear()
         if not results:
+            self.results_model.clear()
             self.status_bar.showMessage("No results found.", 5000)
             self.set_ui_enabled(True)
             return
 
-        # --- DELEGATE TO WORKER ---
-        self.thumbnail_thread = QtCore.QThread()
-        self.thumbnail_worker = ThumbnailWorker(results)
-        self.thumbnail_worker.moveToThread(self.thumbnail_thread)
-        
-        # When the worker is done, call a new method to populate the list
-        self.thumbnail_worker.finished.connect(self.populate_results_list)
-        
-        # Clean up the thread and worker when finished
-        self.thumbnail_thread.started.connect(self.thumbnail_worker.run)
-        self.thumbnail_worker.finished.connect(self.thumbnail_thread.quit)
-        self.thumbnail_worker.finished.connect(self.thumbnail_worker.deleteLater)
-        self.thumbnail_thread.finished.connect(self.thumbnail_thread.deleteLater)
-        
-        self.thumbnail_thread.start()
-    
-    @QtCore.pyqtSlot(list)
-    def populate_results_list(self, items_data):
-        """
-        Receives the prepared thumbnail data from the worker and populates the QListWidget.
-        This method runs on the main UI thread.
-        """
-        for data in items_data:
-            item = QtWidgets.QListWidgetItem()
-            item.setIcon(data['icon'])
-            item.setText(data['text'])
-            item.setToolTip(data['tooltip'])
-            item.setData(QtCore.Qt.UserRole, data['path'])
-            self.results_list.addItem(item)
-            
-        self.status_bar.showMessage(f"Found {len(items_data)} results.", 5000)
+        thumb_dir = os.path.join(self.current_directory, config.CACHE_DIR_NAME, config.THUMBNAIL_CACHE_DIR_NAME)
+        try:
+            os.makedirs(thumb_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Could not create thumbnail cache directory: {e}")
+        self.results_model.set_results(results, thumb_dir)
+        self.status_bar.showMessage(f"Found {len(results)} results.", 5000)
         self.set_ui_enabled(True)
     
     @QtCore.pyqtSlot(QtCore.QPoint)
     def show_results_context_menu(self, pos):
         """Creates and shows a context menu when right-clicking on a result item."""
-        # Get the item that was right-clicked. If the click was not on an item, do nothing.
-        item = self.results_list.itemAt(pos)
-        if item is None:
+        # Get the result that was right-clicked. If the click was not on a result, do nothing.
+        item = self.results_list.indexAt(pos)
+        if not item.isValid():
             return
 
+        # Retrieve the full file path we stored in the item's UserRole data
+        path = item.data(QtCore.Qt.UserRole)
+
         # Create the context menu
         context_menu = QtWidgets.QMenu(self)
 
-        # Create the "Find More Like This" action
-        find_similar_action = QtWidgets.QAction(QtGui.QIcon.fromTheme("system-search"), "Find More Like This", self)
-        
-        # Connect the action's 'triggered' signal to a function that will start the search.
-        # We use a lambda function here to pass the specific item that was clicked.
-        find_similar_action.triggered.connect(lambda: self.search_by_result_item(item))
+        # Create the "Find More Like This" action.
+        # Each action carries the clicked file's path as its data and is connected to a
+        # regular slot, which reads it back via sender() - no per-click closures needed.
+        find_similar_action = QtWidgets.QAction(_themed_icon("system-search"), "Find More Like This", context_menu)
+        find_similar_action.setData(path)
+        find_similar_action.triggered.connect(self._on_find_similar)
         
         # Add the action to the menu
         context_menu.addAction(find_similar_action)
@@ -417,20 +590,27 @@ class MainWindow(QtWidgets.QMainWindow):
         # --- Future actions can be added here ---
         # For example, an action to open the file's containing folder.
         context_menu.addSeparator()
-        open_folder_action = QtWidgets.QAction(QtGui.QIcon.fromTheme("folder"), "Open Containing Folder", self)
-        open_folder_action.triggered.connect(lambda: self.open_containing_folder(item))
+        open_folder_action = QtWidgets.QAction(_themed_icon("folder"), "Open Containing Folder", context_menu)
+        open_folder_action.setData(path)
+        open_folder_action.triggered.connect(self._on_open_containing_folder)
         context_menu.addAction(open_folder_action)
 
 
         # Show the menu at the position of the mouse click
         # The mapToGlobal function converts the widget's local coordinates to screen coordinates.
         context_menu.exec_(self.results_list.mapToGlobal(pos))
+        context_menu.deleteLater() # Also frees its actions
 
-    def search_by_result_item(self, item):
-        """Starts a new search using a result item as the query image."""
-        # Retrieve the full file path we stored in the item's UserRole data
-        query_path = item.data(QtCore.Qt.UserRole)
-        
+    @QtCore.pyqtSlot()
+    def _on_find_similar(self):
+        self.search_by_result_path(self.sender().data())
+
+    @QtCore.pyqtSlot()
+    def _on_open_containing_folder(self):
+        self.open_containing_folder(self.sender().data())
+
+    def search_by_result_path(self, query_path):
+        """Starts a new search using a result's file as the query image."""
         if query_path and os.path.exists(query_path):
             self.status_bar.showMessage(f"Finding images similar to {os.path.basename(query_path)}...")
             self.set_ui_enabled(False)
@@ -441,9 +621,8 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             self.show_error_message(f"File not found: {query_path}")
 
-    def open_containing_folder(self, item):
-        """Opens the system's file explorer to the location of the selected item."""
-        path = item.data(QtCore.Qt.UserRole)
+    def open_containing_folder(self, path):
+        """Opens the system's file explorer to the location of the selected file."""
         if not path:
             return
             
@@ -455,15 +634,16 @@ class MainWindow(QtWidgets.QMainWindow):
         # The simple way is: QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(os.path.dirname(path)))
         
         # Let's use a robust method that tries to select the file.
-        import subprocess
-        import sys
-        
         if sys.platform == 'win32':
-            subprocess.run(['explorer', '/select,', path])
+            command = ['explorer', '/select,', path]
         elif sys.platform == 'darwin': # macOS
-            subprocess.run(['open', '-R', path])
+            command = ['open', '-R', path]
         else: # linux
-            subprocess.run(['xdg-open', os.path.dirname(path)])
+            command = ['xdg-open', os.path.dirname(path)]
+
+        # Popen returns immediately; waiting for the file manager to start would freeze the UI
+        subprocess.Popen(command, close_fds=True, stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
     @QtCore.pyqtSlot(int, int, str)
     def update_progress(self, value, total, msg):
@@ -488,8 +668,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.is_first_load = False # Prevent this from running again
             
             # Now that the model is loaded, check if we should auto-load a directory
-            settings = QtCore.QSettings("MyCompany", config.APP_NAME)
-            last_directory = settings.value("last_directory")
+            last_directory = self._settings.value("last_directory")
             if last_directory and os.path.isdir(last_directory):
                 print(f"Auto-indexing last directory: {last_directory}")
                 self.current_directory = last_directory
@@ -516,20 +695,16 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def set_ui_enabled(self, enabled, is_indexing=False):
         """Enable or disable UI elements to prevent user actions during tasks."""
-        self.dir_button.setEnabled(enabled)
-        self.model_combo.setEnabled(enabled)
-        self.search_input.setEnabled(enabled)
-        self.search_text_button.setEnabled(enabled)
-        self.search_image_button.setEnabled(enabled)
-        self.top_k_spinbox.setEnabled(enabled)
-        
-        # Special handling for cancel button
+        # One call for all search controls; Qt propagates it to the group box's children
+        self.search_groupbox.setEnabled(enabled)
+
+        # The directory and model can be changed whenever no indexing is running
+        self.dir_button.setEnabled(enabled or not is_indexing)
+        self.model_combo.setEnabled(enabled or not is_indexing)
         self.cancel_button.setEnabled(is_indexing)
-        if not is_indexing:
-             self.dir_button.setEnabled(True)
-             self.model_combo.setEnabled(True)
 
 
+    @QtCore.pyqtSlot(QtCore.QModelIndex)
     def open_image_in_viewer(self, item):
         """Opens the selected image using the system's default viewer."""
         path = item.data(QtCore.Qt.UserRole)
@@ -538,28 +713,28 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def _load_settings(self):
         """Loads and applies settings from the previous session."""
-        settings = QtCore.QSettings("MyCompany", config.APP_NAME)
-        
         # Restore window geometry
-        geometry = settings.value("geometry")
+        geometry = self._settings.value("geometry")
         if geometry:
             self.restoreGeometry(geometry)
 
     def closeEvent(self, event):
         """Saves settings and properly shuts down the worker thread when the window is closed."""
         # --- SAVE SETTINGS ---
-        # Create a QSettings object. The arguments are your organization and application name.
-        # This ensures settings are stored in a unique, standard location.
-        settings = QtCore.QSettings("MyCompany", config.APP_NAME)
-        
         # Save window geometry (size and position)
-        settings.setValue("geometry", self.saveGeometry())
+        self._settings.setValue("geometry", self.saveGeometry())
         
         # Save the last used directory, if one was selected
         if self.current_directory:
-            settings.setValue("last_directory", self.current_directory)
+            self._settings.setValue("last_directory", self.current_directory)
+        self._settings.sync()
+
+        # Persist the engine's query caches. This runs on the worker thread, which owns the engine.
+        QtCore.QMetaObject.invokeMethod(self.engine, "save_query_cache", QtCore.Qt.BlockingQueuedConnection)
 
-        # --- SHUT DOWN THREAD ---
+        # --- SHUT DOWN THREADS ---
+        self.thumbnail_pool.clear() # Drop thumbnails that haven't started decoding yet
+        self.thumbnail_pool.waitForDone()
         self.worker_thread.quit()
         self.worker_thread.wait() # Wait for the thread to finish
         event.accept()
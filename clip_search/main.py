@@ -1,10 +1,10 @@
 # In clip_search/main.py
 
 import sys
-from PyQt5 import QtWidgets
+import multiprocessing
+from PyQt5 import QtWidgets, QtGui, QtCore
 
-# Import the MainWindow class from our gui package
-from clip_search.gui.main_window import MainWindow
+from clip_search import config
 
 # Define a dummy stream object for the packaged executable
 class DummyStream:
@@ -28,12 +28,31 @@ def main():
     if 'Fusion' in QtWidgets.QStyleFactory.keys():
         app.setStyle(QtWidgets.QStyleFactory.create('Fusion'))
 
+    # Since Qt 5.15, QImageReader refuses images that need more than 128 MB to decode,
+    # which large PNG/WebP photos easily do. Their thumbnails would never load.
+    if hasattr(QtGui.QImageReader, 'setAllocationLimit'):
+        QtGui.QImageReader.setAllocationLimit(0)
+
+    # Show a splash screen right away, before the (slow) application modules are imported
+    splash_pixmap = QtGui.QPixmap(400, 120)
+    splash_pixmap.fill(QtGui.QColor("#f0f0f0"))
+    splash = QtWidgets.QSplashScreen(splash_pixmap)
+    splash.showMessage(f"Starting {config.APP_NAME}...", QtCore.Qt.AlignCenter)
+    splash.show()
+    app.processEvents()
+
+    # Import the MainWindow class from our gui package
+    from clip_search.gui.main_window import MainWindow
+
     # Create and show the main window
     main_window = MainWindow()
     main_window.show()
+    splash.finish(main_window)
 
     # Start the Qt event loop
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
+    # Required for the indexing worker processes in a bundled executable
+    multiprocessing.freeze_support()
     main()